@@ -71,7 +71,7 @@ class NegatedConstraint(Constraint):
         return not self._constraint.test(sample)
     
     def test_matrix(self, data_matrix: np.ndarray) -> np.ndarray:
-        return ~self._constraint.test(data_matrix)
+        return ~self._constraint.test_matrix(data_matrix)
     
     def __invert__(self):
         return self._constraint
@@ -3,20 +3,45 @@
 # Licensed under the BSD 3-Clause License
 # Copyright (c) 2020, Yuriy Sverchkov
 
-from typing import Collection, Iterable, Optional, Protocol
+from typing import Collection, Iterable, Optional, Protocol, Tuple
+from copy import copy
 from abc import abstractmethod
 from logging import getLogger
 
 import numpy as np
-from scipy.stats import ks_2samp, chi2_contingency
+from scipy.special import ndtr
+from scipy.stats import chi2_contingency, kstwo, truncnorm
 
-from generalizedtrees.constraints import Constraint, test
+from generalizedtrees.constraints import Constraint, Op, SimpleConstraint, test, vectorize_constraints
 from generalizedtrees.features import FeatureSpec
 
 logger = getLogger()
 
 # Utility functions
 
+def _ks_2samp_statistics(data_1, data_2):
+    """
+    Two-sample Kolmogorov-Smirnov statistics for each column of data_1 and data_2.
+
+    Sorts the pooled columns once and accumulates the difference of the empirical CDFs
+    (scaled by n_1*n_2 to keep the arithmetic exact), evaluating it after the last of
+    each run of tied values.
+    """
+    n_1 = data_1.shape[0]
+    n_2 = data_2.shape[0]
+
+    pooled = np.concatenate((data_1, data_2), axis=0)
+    order = np.argsort(pooled, axis=0, kind='stable')
+    pooled_sorted = np.take_along_axis(pooled, order, axis=0)
+
+    cdf_diff = np.cumsum(np.where(order < n_1, n_2, -n_1), axis=0)
+
+    # The CDFs only step after the last of tied values. The difference is 0 after the final row.
+    cdf_diff[:-1][pooled_sorted[1:] == pooled_sorted[:-1]] = 0
+
+    return np.abs(cdf_diff).max(axis=0) / (n_1 * n_2)
+
+
 def same_distribution(data_1, data_2, /, feature_spec, alpha):
     """
     Performs statistical test to determine if data are from the
@@ -24,39 +49,42 @@ def same_distribution(data_1, data_2, /, feature_spec, alpha):
 
     data_1 and data_2 need to be numpy matrices
     """
+    discrete = np.array([bool(spec & FeatureSpec.DISCRETE) for spec in feature_spec])
+
+    n_1 = data_1.shape[0]
     n_tests = 0
     min_p = 1.0
-    for i in range(len(feature_spec)):
 
-        if feature_spec[i] & FeatureSpec.DISCRETE:
-            # Get frequencies.
-            # Note: we're assuming that the union of values present in the samples is
-            # the set of possible values. This is not all possible values that the
-            # variable could originally take.
-            v1, c1 = np.unique(data_1[:, i], return_counts=True)
-            map1 = {v1[j]: c1[j] for j in range(len(v1))}
+    if not discrete.all():
+        # KS-tests over all non-discrete features.
+        # The (asymptotic) p-value decreases with the statistic, so only the largest is needed.
+        d = _ks_2samp_statistics(data_1[:, ~discrete].astype(float), data_2[:, ~discrete].astype(float))
+        n_2 = data_2.shape[0]
+        min_p = kstwo.sf(d.max(), np.round(n_1 * n_2 / (n_1 + n_2)))
+        n_tests = len(d)
 
-            v2, c2 = np.unique(data_2[:, i], return_counts=True)
-            map2 = {v2[j]: c2[j] for j in range(len(v2))}
+        # The Bonferroni threshold can't get stricter than alpha/d, so no
+        # further tests can change the outcome once we're below it.
+        if min_p < alpha/len(feature_spec):
+            return True
 
-            values = np.union1d(v1, v2)
-            k = len(values)
+    for i in np.flatnonzero(discrete):
 
-            # If only one value is present skip this test
-            if k > 1:
+        # Get frequencies.
+        # Note: we're assuming that the union of values present in the samples is
+        # the set of possible values. This is not all possible values that the
+        # variable could originally take.
+        values, codes = np.unique(np.concatenate((data_1[:, i], data_2[:, i])), return_inverse=True)
+        k = len(values)
 
-                freq = [[map1[v] if v in map1 else 0 for v in values],
-                        [map2[v] if v in map2 else 0 for v in values]]
+        # If only one value is present skip this test
+        if k > 1:
 
-                _, p, _, _ = chi2_contingency(observed=freq)
+            freq = [np.bincount(codes[:n_1], minlength=k),
+                    np.bincount(codes[n_1:], minlength=k)]
+
+            _, p, _, _ = chi2_contingency(observed=freq)
 
-                if p < min_p:
-                    min_p = p
-                n_tests += 1
-        
-        else:
-            # KS-test
-            _, p = ks_2samp(data_1[:, i], data_2[:, i])
             if p < min_p:
                 min_p = p
             n_tests += 1
@@ -77,6 +105,12 @@ class DataFactoryLC(Protocol):
     def refit(self, data_matrix: np.ndarray) -> 'DataFactoryLC':
         return self
 
+    def spawn(self) -> 'DataFactoryLC':
+        """
+        A factory that generates like this one but from its own random generator, seeded from this one's.
+        """
+        return self
+
     @abstractmethod
     def generate(self, n: int, constraints: Iterable[Constraint] = ()) -> np.ndarray:
         raise NotImplementedError
@@ -91,9 +125,17 @@ class ConstraintFreeSamplingFactoryLC(DataFactoryLC):
     max_sample: int
     on_timeout: str = 'partial'
 
+    rng: np.random.Generator
+
+    def spawn(self) -> 'DataFactoryLC':
+        clone = copy(self)
+        clone.rng = np.random.default_rng(self.rng.integers(2**63))
+        return clone
+
     def generate(self, n: int, constraints: Iterable[Constraint] = ()) -> np.ndarray:
 
         n = max(0, n)
+        constraints = tuple(constraints)
 
         logger.debug(f'Drawing sample of size {n}')
 
@@ -110,7 +152,7 @@ class ConstraintFreeSamplingFactoryLC(DataFactoryLC):
             for _ in range(self.max_attempts):
                 needed = n - i
                 n_sampled = round(min(needed * oversample_prop, self.max_sample))
-                sample = self._generate(n_sampled)
+                sample = self._generate(n_sampled, constraints)
                 accepted = test(constraints, sample)
 
                 #if not all(accepted):
@@ -118,7 +160,7 @@ class ConstraintFreeSamplingFactoryLC(DataFactoryLC):
                 #    for j in np.nonzero(accepted):
                 #        logger.debug(f'Rejected sample: {sample[j,:]}')
                 
-                n_acc = sum(accepted)
+                n_acc = np.count_nonzero(accepted)
                 n_fit = min(n_acc, needed)
                 logger.debug(
                     f'Sampling loop: i={i}, n={n}. '
@@ -133,7 +175,7 @@ class ConstraintFreeSamplingFactoryLC(DataFactoryLC):
             logger.debug(f'Failed to generate a sample for constraints: {constraints}')
             if self.on_timeout == 'partial':
                 logger.warning('Returning partial sample')
-                return result[1:i,:]
+                return result[:i,:]
             elif self.on_timeout == 'dirty':
                 logger.warning('Matrix with uninitialized elements')
                 return result
@@ -142,7 +184,13 @@ class ConstraintFreeSamplingFactoryLC(DataFactoryLC):
 
 
     @abstractmethod
-    def _generate(self, n: int) -> np.ndarray:
+    def _generate(self, n: int, constraints: Iterable[Constraint] = ()) -> np.ndarray:
+        """
+        Draw n samples.
+
+        Implementations may use the constraints to narrow down where they sample, but don't have
+        to: every sample is tested against all constraints afterwards.
+        """
         raise NotImplementedError
 
 
@@ -153,6 +201,9 @@ class TrepanDataFactoryLC(ConstraintFreeSamplingFactoryLC):
 
     rng: np.random.Generator
 
+    # Per-feature (values, probabilities) of discrete features, computed once per refit
+    _discrete_tables: Optional[dict] = None
+
     def __init__(
         self,
         alpha: float = 0.05,
@@ -192,30 +243,90 @@ class TrepanDataFactoryLC(ConstraintFreeSamplingFactoryLC):
             return self
         
         clone = self.copy()
-        clone.data_matrix = data_matrix
+        # Sampling and distribution tests work feature-by-feature, so store features contiguously
+        clone.data_matrix = np.asfortranarray(data_matrix)
+        clone._discrete_tables = {
+            i: clone._empirical_distribution(i)
+            for i, spec in enumerate(clone.feature_spec) if spec & FeatureSpec.DISCRETE}
 
         return clone
         
-    def _generate(self, n: int) -> np.ndarray:
+    def _empirical_distribution(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        values, counts = np.unique(self.data_matrix[:, i], return_counts=True)
+        return values, counts / self.data_matrix.shape[0]
+
+    def _generate(self, n: int, constraints: Iterable[Constraint] = ()) -> np.ndarray:
+
+        d = self.data_matrix.shape[1]
+
+        # Single-feature constraints are sampled from directly instead of being rejected.
+        simple_constraints = [c for c in constraints if isinstance(c, SimpleConstraint)]
+        upper, lower, _, _ = vectorize_constraints(
+            (c for c in simple_constraints if c.operator in (Op.GT, Op.LEQ)), d)
 
         # The Trepan generator independently generates the individual feature values.
-        return np.column_stack([self._generate_feature(i, n) for i in range(self.data_matrix.shape[1])])
+        result = np.empty((n, d), dtype=np.result_type(self.data_matrix.dtype, float), order='F')
+        for i in range(d):
+            result[:, i] = self._generate_feature(
+                i, n, lower[i], upper[i], [c for c in simple_constraints if c.feature == i])
+        return result
     
-    def _generate_feature(self, i: int, n: int) -> np.ndarray:
+    def _generate_feature(
+        self,
+        i: int,
+        n: int,
+        lower: float = -np.inf,
+        upper: float = np.inf,
+        constraints: Iterable[SimpleConstraint] = ()
+    ) -> np.ndarray:
 
         if self.feature_spec[i] is FeatureSpec.CONTINUOUS:
             # Sample from a KDE.
             # We use Generator and not RandomState but KDE implementations use RandomState
             # so it's more reliable to just implement the sampling here. 
+            data_vector = self.data_matrix[:, i]
+            scale = 1/np.sqrt(self.data_matrix.shape[0])
+
+            if lower > -np.inf or upper < np.inf:
+                # Sample from the KDE truncated to [lower, upper]: pick kernels in proportion to
+                # their mass in the interval, then sample from the truncated kernels.
+                a = (lower - data_vector) / scale
+                b = (upper - data_vector) / scale
+                # (Computing the mass from the nearer tail avoids cancellation far from the mean)
+                mass = np.where(a > 0, ndtr(-a) - ndtr(-b), ndtr(b) - ndtr(a))
+                total_mass = mass.sum()
+
+                if total_mass > 0:
+                    loc = self.rng.choice(data_vector, p=mass/total_mass, size=n)
+                    return truncnorm.rvs(
+                        (lower - loc) / scale,
+                        (upper - loc) / scale,
+                        loc=loc,
+                        scale=scale,
+                        size=n,
+                        random_state=self.rng)
+
             return self.rng.normal(
-                loc = self.rng.choice(self.data_matrix[:, i], size=n),
-                scale = 1/np.sqrt(self.data_matrix.shape[0]),
+                loc = self.rng.choice(data_vector, size=n),
+                scale = scale,
                 size = n)
 
         elif self.feature_spec[i] & FeatureSpec.DISCRETE:
             # Sample from the empirical distribution
-            values, counts = np.unique(self.data_matrix[:,i], return_counts=True)
-            return self.rng.choice(values, p=counts/self.data_matrix.shape[0], size=n)
+            if self._discrete_tables is None:
+                values, p = self._empirical_distribution(i)
+            else:
+                values, p = self._discrete_tables[i]
+
+            # Restricted to values allowed by the constraints (if any are)
+            allowed = np.ones(len(values), dtype=bool)
+            for c in constraints:
+                allowed &= c.operator.test(values, c.value)
+            if not allowed.all() and allowed.any():
+                values = values[allowed]
+                p = p[allowed] / p[allowed].sum()
+
+            return self.rng.choice(values, p=p, size=n)
         
         else:
             raise ValueError(f"I don't know how to handle feature spec {self.feature_spec[i]}")
@@ -247,7 +358,7 @@ class SmearingDataFactoryLC(ConstraintFreeSamplingFactoryLC):
         
         return self
 
-    def _generate(self, n) -> np.ndarray:
+    def _generate(self, n: int, constraints: Iterable[Constraint] = ()) -> np.ndarray:
 
         m, d = self.data_matrix.shape
 
@@ -94,7 +94,7 @@ class SupervisedDataGivensLC(GivensLC):
         # Reshape targets to matrix form
         if target_shape == 'label_vector':
             # This does 1-hot encoding
-            self.target_matrix = np.array([x == self.target_names for x in targets], dtype=float)
+            self.target_matrix = (targets[:, np.newaxis] == np.asarray(self.target_names)[np.newaxis, :]).astype(float)
         else:
             self.target_matrix = targets
 
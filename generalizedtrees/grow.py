@@ -3,7 +3,8 @@
 # Licensed under the BSD 3-Clause License
 # Copyright (c) 2020, Yuriy Sverchkov
 
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
 
 from generalizedtrees.givens import GivensLC
 from generalizedtrees.node import NodeBuilderLC
@@ -22,6 +23,13 @@ from generalizedtrees.tree import Tree
 class GreedyBuilderLC:
     """
     Greedy tree building strategy
+
+    With n_workers > 1, up to n_workers nodes are popped from the queue at a time and expanded
+    concurrently in a thread pool, each with its own random generator spawned in pop order.
+    Their children are then added to the tree and queue in pop order, checking the global
+    stopping criterion before each node as the sequential build would. Since children of a batch
+    don't compete with its other members for expansion, the resulting tree can differ from the
+    sequentially built tree.
     """
 
     new_queue: Callable[..., CanPushPop]
@@ -29,6 +37,7 @@ class GreedyBuilderLC:
     splitter: SplitConstructorLC
     global_stop: GlobalStopLC = NeverStopLC()
     local_stop: LocalStopLC = NeverStopLC()
+    n_workers: int = 1
 
     def __init__(self):
         self.splitter = DefaultSplitConstructorLC()
@@ -50,23 +59,63 @@ class GreedyBuilderLC:
         # Init node expansion order tracking
         node_number: int = 0
 
-        # Queue-order expansion:
-        while queue and not self.global_stop.check(tree):
+        executor = ThreadPoolExecutor(max_workers=self.n_workers) if self.n_workers > 1 else None
+        expand = map if executor is None else executor.map
+
+        try:
+            # Queue-order expansion:
+            while queue and not self.global_stop.check(tree):
+
+                # Pop a batch of (at most n_workers) nodes
+                batch = []
+                while queue and len(batch) < self.n_workers:
+
+                    entry = queue.pop()
+                    node, ptr, data, y = entry
+                    node.node_number = node_number
+                    node_number += 1
+
+                    expandable = not self.local_stop.check(tree.node(ptr), data, y)
+                    if expandable and executor is not None:
+                        # Spawned here, in pop order, so that results don't depend on thread timing
+                        self.node_builder.spawn_generator(node)
+
+                    batch.append((entry, expandable))
 
-            node, ptr, data, y = queue.pop()
-            node.node_number = node_number
-            node_number += 1
+                expansions = iter(expand(self._expand_node, [entry for entry, expandable in batch if expandable]))
 
-            if not self.local_stop.check(tree.node(ptr), data, y):
+                # Merge children into the tree in pop order
+                for i, (entry, expandable) in enumerate(batch):
 
-                node.split = self.splitter.construct_split(node, data, y)
+                    if self.global_stop.check(tree):
+                        # The rest of the batch would not have been popped: leave them unexpanded
+                        for (node, _, _, _), _ in batch[i:]:
+                            node.node_number = None
+                            node.split = None
+                        break
 
-                if node.split:
-                    for child, c_data, c_y in self.node_builder.generate_children(node, data, y):
-                        child_ptr = tree.add_node(child, parent_key=ptr)
-                        queue.push((child, child_ptr, c_data, c_y))
+                    if expandable:
+                        _, ptr, _, _ = entry
+                        for child, c_data, c_y in next(expansions):
+                            child_ptr = tree.add_node(child, parent_key=ptr)
+                            queue.push((child, child_ptr, c_data, c_y))
+
+        finally:
+            if executor is not None:
+                executor.shutdown()
         
         return tree
+
+    def _expand_node(self, entry) -> List[Tuple]:
+
+        node, _, data, y = entry
+
+        node.split = self.splitter.construct_split(node, data, y)
+
+        if node.split:
+            return list(self.node_builder.generate_children(node, data, y))
+
+        return []
     
     def prune_tree(self, tree: Tree):
         return tree
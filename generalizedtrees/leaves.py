@@ -63,7 +63,7 @@ class SKProbaClassifier(LocalEstimator):
         # Convert y matrix to label vector
         targets = y.argmax(axis=1)
 
-        if self.fallback and len(np.unique(targets)) < 2:
+        if self.fallback and np.count_nonzero(np.bincount(targets, minlength=y.shape[1])) < 2:
             return ConstantEstimator().fit(y)
 
         self.classifier.fit(x, targets, **kwargs)
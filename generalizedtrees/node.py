@@ -15,7 +15,6 @@ from generalizedtrees.givens import DataWithOracleGivensLC, GivensLC, Supervised
 from generalizedtrees.leaves import LocalEstimator
 from generalizedtrees.scores import soft_hard_product_loss
 from generalizedtrees.split import SplitTest
-from generalizedtrees.util import order_by
 
 
 ##################################
@@ -25,6 +24,9 @@ from generalizedtrees.util import order_by
 # Base definition for node:
 class NodeBase:
 
+    # Trees can hold many nodes, so we don't give each one an instance __dict__
+    __slots__ = ('local_constraint', 'model', 'split', 'node_number')
+
     def __init__(self):
         # "Declares" member attributes that are used regardless of specific tree implementation 
         self.local_constraint: Optional[Constraint] = None
@@ -49,6 +51,13 @@ class NodeBuilderLC(Protocol):
     def generate_children(self, node: N) -> Iterable[Tuple[N, np.ndarray, np.ndarray]]:
         raise NotImplementedError
 
+    def spawn_generator(self, node: N) -> None:
+        """
+        Give the node its own source of randomness for generating its children, so that nodes
+        can be expanded concurrently with reproducible results.
+        """
+        pass
+
 ###################
 # Implementations #
 ###################
@@ -58,6 +67,9 @@ class NodeBuilderLC(Protocol):
 
 # Node class
 class Node(NodeBase):
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
@@ -101,6 +113,8 @@ class SupervisedNodeBuilderLC(NodeBuilderLC):
 # Model translation node
 class MTNode(NodeBase):
 
+    __slots__ = ('n_training', 'coverage', 'constraints', 'data_factory')
+
     def __init__(self, n_training: int) -> None:
         super().__init__()
 
@@ -111,14 +125,16 @@ class MTNode(NodeBase):
 
     def fit(self, data: np.ndarray, y: np.ndarray) -> 'MTNode':
 
-        self.model.fit(data, y)
+        # Estimators may return a substitute (e.g. SKProbaClassifier falls back to a constant)
+        self.model = self.model.fit(data, y)
 
         return self
 
 # Trepan node
-@order_by('score')
 class TrepanNode(MTNode):
 
+    __slots__ = ('fidelity_loss_fn', 'fidelity', 'score')
+
     def __init__(
         self,
         n_training: int,
@@ -142,6 +158,21 @@ class TrepanNode(MTNode):
 
         return self
 
+def _select_rows_and_append(matrix: np.ndarray, mask: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    Equivalent to np.concatenate((matrix[mask, :], rows), axis=0), but copies the selected rows
+    directly into the result instead of through a temporary array.
+    """
+
+    n_selected = np.count_nonzero(mask)
+    result = np.empty(
+        (n_selected + rows.shape[0],) + matrix.shape[1:],
+        dtype=np.result_type(matrix, rows))
+    np.compress(mask, matrix, axis=0, out=result[:n_selected])
+    result[n_selected:] = rows
+
+    return result
+
 # For model translation
 class ModelTranslationNodeBuilderLC(NodeBuilderLC):
 
@@ -179,7 +210,7 @@ class ModelTranslationNodeBuilderLC(NodeBuilderLC):
 
         gen_data = node.data_factory.generate(self.min_samples - n_training)
 
-        data = np.row_stack((self.training_data, gen_data))
+        data = np.concatenate((self.training_data, gen_data), axis=0)
         y = self.oracle(data)
 
         node.model = self.new_model()
@@ -190,44 +221,67 @@ class ModelTranslationNodeBuilderLC(NodeBuilderLC):
 
         return node, data, y
 
+    def spawn_generator(self, node: MTNode) -> None:
+        node.data_factory = node.data_factory.spawn()
+
     def generate_children(self, node: MTNode, data: np.ndarray, y: np.ndarray) -> Iterable[MTNode]:
 
         if node.split is not None:
             branches = node.split.pick_branches(data)
+
+            children = []
+            gen_batches = []
+
             for b, c in enumerate(node.split.constraints):
                 idx = branches == b
+                n_training = np.count_nonzero(idx[:node.n_training])
 
-                child = self.node_type(sum(idx[:node.n_training]))
+                child = self.node_type(n_training)
 
-                pregen_data = data[idx, :]
-                pregen_y = y[idx, :]
+                child.local_constraint = c
+                child.constraints = node.constraints + (c,)
 
-                if (pregen_data.shape[0] < self.min_samples):
-                    child.data_factory = node.data_factory.refit(pregen_data[:child.n_training, :])
+                n_child = np.count_nonzero(idx)
 
-                    gen_data = child.data_factory.generate(self.min_samples - pregen_data.shape[0])
-                    gen_y = self.oracle(gen_data)
+                if (n_child < self.min_samples):
+                    child.data_factory = node.data_factory.refit(
+                        data[:node.n_training, :][idx[:node.n_training], :])
+                    gen_data = child.data_factory.generate(
+                        self.min_samples - n_child,
+                        child.constraints)
 
                 else:
                     child.data_factory = node.data_factory
-                    gen_data = np.empty((0, pregen_data.shape[1]))
-                    gen_y = np.empty((0, y.shape[1]))
-
-                child_data = np.row_stack((pregen_data, gen_data))
-                child_y = np.row_stack((pregen_y, gen_y))
+                    gen_data = data[:0, :]
 
                 child.model = self.new_model()
 
-                child.local_constraint = c
-                child.constraints = node.constraints + (c,)
-
                 if node.n_training <= 0:
                     child.coverage = 0
                 else:
-                    child.coverage = node.coverage * sum(idx[:node.n_training]) / node.n_training
+                    child.coverage = node.coverage * n_training / node.n_training
 
-                child.fit(child_data, child_y)
+                children.append((child, idx))
+                gen_batches.append(gen_data)
 
-                yield child, child_data, child_y
+            # Label the generated data of all children with a single oracle call
+            gen_sizes = [gen_data.shape[0] for gen_data in gen_batches]
+            if sum(gen_sizes) > 0:
+                gen_y_batches = np.split(
+                    np.asarray(self.oracle(np.concatenate(gen_batches, axis=0))),
+                    np.cumsum(gen_sizes)[:-1])
+            else:
+                gen_y_batches = [None] * len(gen_batches)
+
+            for (child, idx), gen_data, gen_y in zip(children, gen_batches, gen_y_batches):
+
+                if gen_data.shape[0] > 0:
+                    child_data = _select_rows_and_append(data, idx, gen_data)
+                    child_y = _select_rows_and_append(y, idx, gen_y)
+                else:
+                    child_data = data[idx, :]
+                    child_y = y[idx, :]
 
+                child.fit(child_data, child_y)
 
+                yield child, child_data, child_y
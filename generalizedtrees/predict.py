@@ -34,8 +34,11 @@ def _estimate_subtree(node: Tree.Node, data_matrix, idx, result_matrix, limiter=
     
     else:
         branches = node.item.split.pick_branches(data_matrix[idx,:])
-        for b in np.unique(branches):
-            _estimate_subtree(node[b], data_matrix, idx[branches==b], result_matrix, limiter)
+        # Partition instances by branch with one sort instead of a mask per branch
+        branch_idx = np.split(idx[np.argsort(branches, kind='stable')], np.cumsum(np.bincount(branches))[:-1])
+        for b, b_idx in enumerate(branch_idx):
+            if len(b_idx) > 0:
+                _estimate_subtree(node[b], data_matrix, b_idx, result_matrix, limiter)
 
     return result_matrix
 
@@ -21,12 +21,28 @@ class CanPushPop(Protocol, Generic[T]):
         raise NotImplementedError
 
 class Heap(list, CanPushPop):
+    """
+    Min-heap of tree builder queue entries, prioritized by the score of the entry's node.
+
+    Entries are stored as (score, insertion count, entry) tuples so that ties are broken by
+    insertion order and nodes are never compared directly.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._count: int = 0
+
+    @staticmethod
+    def priority(item) -> float:
+        node = item[0]
+        return node.score
 
     def push(self, item):
-        heappush(self, item)
+        heappush(self, (self.priority(item), self._count, item))
+        self._count += 1
     
     def pop(self):
-        return heappop(self)
+        return heappop(self)[-1]
 
 class Stack(deque, CanPushPop):
 
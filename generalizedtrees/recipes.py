@@ -64,15 +64,19 @@ def trepan(
     min_samples: int = 1000,
     dist_test_alpha = 0.05,
     max_attempts = 1000,
-    rng = default_rng()
+    rng = default_rng(),
+    n_workers: int = 1
 ) -> GreedyTreeLearner:
     """
     Recipe for Trepan* (Craven and Shavlik 1995)
 
     *This version only implements axis-aligned splits (no m-of-n splits) and information gain as the split criterion.
+
+    Setting n_workers > 1 expands that many of the most promising nodes concurrently (see GreedyBuilderLC).
     """
 
     learner = GreedyTreeLearner()
+    learner.builder.n_workers = n_workers
     if m_of_n:
         learner.builder.splitter = MofNSplitConstructorLC()
     learner.builder.splitter.only_use_training_to_generate = True
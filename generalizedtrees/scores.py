@@ -22,7 +22,10 @@ def gini_of_p_matrix(pm: np.ndarray):
 
     if len(pm) == 0: return 0
 
-    p = pm.mean(axis=0)
+    return gini_of_p_vector(pm.mean(axis=0))
+
+
+def gini_of_p_vector(p):
 
     return np.sum(p * (1 - p))
 
@@ -53,8 +56,8 @@ def entropy_of_p_vector(p):
 
 def soft_hard_product_loss(y1, y2):
 
-    hard2 = np.eye(y2.shape[1])[y2.argmax(axis=1),:]
-    return 1 - (y1 * hard2).mean(axis=0).sum()
+    # Equivalent to multiplying y1 by the one-hot encoding of y2's argmax
+    return 1 - y1[np.arange(y1.shape[0]), y2.argmax(axis=1)].mean()
 
 def product_loss(y1, y2):
     
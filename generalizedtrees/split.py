@@ -5,9 +5,9 @@
 
 from abc import abstractmethod
 from logging import getLogger
-from typing import Collection, Container, Iterable, Protocol, Optional
+from typing import Collection, Container, Iterable, List, Protocol, Optional
 from functools import cached_property
-from collections import defaultdict
+from collections import Counter, defaultdict
 from operator import itemgetter
 import heapq
 
@@ -110,14 +110,22 @@ class SplitEveryValue(SplitTest):
         self.feature_name = feature_name
         self.feature = feature
         self.values = values
-        self.map = {values[i]: i for i in range(len(values))}
+        self._sorter = np.argsort(values)
     
     def pick_branches(self, data_matrix):
-        return data_matrix[:, self.feature].map(self.map)
+        v = data_matrix[:, self.feature]
+        sorted_values = np.asarray(self.values)[self._sorter]
+        positions = np.searchsorted(sorted_values, v).clip(max=len(sorted_values)-1)
+        matched = sorted_values[positions] == v
+        if not np.all(matched):
+            raise ValueError(
+                f'Feature {self.feature} has values {np.unique(v[~matched])} '
+                f'that are not among the split values {self.values}')
+        return self._sorter[positions].astype(np.intp)
 
     @cached_property
     def constraints(self):
-        return (EQConstraint(self.feature, v) for v in self.values)
+        return tuple(EQConstraint(self.feature, v) for v in self.values)
 
     def __str__(self):
         if self.feature_name is None:
@@ -146,12 +154,124 @@ class BinarySplit(SplitTest):
         # Calling bool on a constraint object should return false if that constraint is vacuous
         return bool(self.constraint)
 
+
+class _ConstraintTestCache:
+    """
+    Memoizes constraint tests on a fixed data matrix over the course of a split search.
+
+    Atomic constraints are tested once. Satisfied-atom counts of m-of-n constraints are only kept
+    for the constraints currently being expanded (see expand), so that a neighbor grown from one of
+    them by MofN.neighboring_tests is counted with a single addition. Counts of other m-of-n
+    constraints are summed from the cached atom tests and not stored, which keeps memory bounded
+    by the number of atoms plus the number of constraints being expanded.
+    """
+
+    def __init__(self, data_matrix: np.ndarray):
+        self.data_matrix = data_matrix
+        self._atom_tests = {}
+        self._expanded_counts = {}
+
+    def expand(self, constraints: Iterable[Constraint]) -> None:
+        """
+        Keep satisfied-atom counts for the given constraints, dropping those kept for any others.
+        """
+        expanded_counts = {}
+        for constraint in constraints:
+            atoms = constraint.constraints if isinstance(constraint, MofN) else (constraint,)
+            if atoms:
+                try:
+                    counts = self._expanded_counts.get(atoms)
+                    if counts is None:
+                        counts = self._satisfied_counts(atoms)
+                    expanded_counts[atoms] = counts
+                except TypeError: # Unhashable constraints can't be cached
+                    pass
+        self._expanded_counts = expanded_counts
+
+    def _test_atom(self, constraint) -> np.ndarray:
+        result = self._atom_tests.get(constraint)
+        if result is None:
+            result = self._atom_tests[constraint] = constraint.test_matrix(self.data_matrix)
+        return result
+
+    def _satisfied_counts(self, atoms: tuple) -> np.ndarray:
+        counts = self._expanded_counts.get(atoms[:-1])
+        if counts is None:
+            counts = np.zeros(self.data_matrix.shape[0], dtype=int)
+            for atom in atoms[:-1]:
+                counts += self._test_atom(atom)
+        return counts + self._test_atom(atoms[-1])
+
+    def test_matrix(self, constraint) -> np.ndarray:
+        try:
+            if isinstance(constraint, MofN):
+                if not constraint.constraints:
+                    return np.full(self.data_matrix.shape[0], constraint.m_to_satisfy <= 0)
+                return self._satisfied_counts(constraint.constraints) >= constraint.m_to_satisfy
+            return self._test_atom(constraint)
+        except TypeError: # Unhashable constraints can't be cached
+            return constraint.test_matrix(self.data_matrix)
+
+
+class _CachedBinarySplit(BinarySplit):
+    """
+    Binary split that picks branches through a constraint test cache when given the cached data.
+
+    Only used for scoring during split search; the constructed split is a plain BinarySplit.
+    """
+
+    def __init__(self, constraint, cache: _ConstraintTestCache):
+        super().__init__(constraint)
+        self._cache = cache
+
+    def pick_branches(self, data_matrix: np.ndarray):
+        if data_matrix is self._cache.data_matrix:
+            return self._cache.test_matrix(self.constraint).astype(np.intp)
+        return super().pick_branches(data_matrix)
+
 ###################################
 # Base split generating functions #
 ###################################
 
 
-def fayyad_thresholds(feature_vector, feature_index, target_matrix):
+def _fayyad_split_points(feature_vector, target_matrix, order=None) -> np.ndarray:
+    """
+    Thresholds between distinctly labeled distinct adjacent values of a feature.
+
+    A run of identical feature values that contains more than one label counts as distinctly
+    labeled with respect to the next value.
+
+    :param feature_vector: Input data feature vector, length n
+    :param target_matrix: Target value matrix, n-by-k
+    :param order: Stable argsort of feature_vector (computed if not given)
+    """
+    if order is None:
+        order = np.argsort(feature_vector, kind='stable')
+
+    x = feature_vector[order]
+    y = target_matrix[order]
+    n = len(x)
+
+    if n < 2:
+        return x[:0]
+
+    # For each pair of adjacent sorted values: whether x steps up, whether y differs
+    x_step = x[:-1] < x[1:]
+    y_step = (y[:-1] != y[1:]).reshape(n-1, -1).any(axis=1)
+
+    # Index of the run of identical x-values that each pair starts in
+    run = np.cumsum(x_step) - x_step
+
+    # Runs containing a y-collision (identical x-values with distinct y-values)
+    y_collision = np.zeros(n, dtype=bool)
+    y_collision[run[y_step & ~x_step]] = True
+
+    split = x_step & (y_step | y_collision[run])
+
+    return (x[:-1][split] + x[1:][split])/2
+
+
+def fayyad_thresholds(feature_vector, feature_index, target_matrix, order=None):
     """
     Generator of splits for numeric (or more generally orderable) values.
 
@@ -162,28 +282,25 @@ def fayyad_thresholds(feature_vector, feature_index, target_matrix):
     :param data: Input data feature vector, length n
     :param feature: Index of splitting feature (needed to create split object)
     :param target: Target value matrix, n-by-k
+    :param order: Stable argsort of the feature vector (computed if not given)
     """
-    v = sorted(zip(feature_vector, target_matrix), key=itemgetter(0))
-    
-    # Flag for handling the case when two identical x-values have distinct y-values
-    y_collision = False
-
-    for j in range(1, len(v), 1):
-        x_prev, y_prev = v[j-1]
-        x, y = v[j]
-
-        # Only place splits between distinct x-values
-        if x_prev < x:
-            # Only place splits between distinct y-values
-            if y_collision or np.any(y_prev != y):
-                split_point = (x_prev + x)/2
-                yield SplitGT(feature_index, split_point)
-            # Reset collision flag when advancing in x-space
-            y_collision = False
-        else:
-            # Detect y-collision
-            if np.any(y_prev != y):
-                y_collision = True
+    for split_point in _fayyad_split_points(feature_vector, target_matrix, order):
+        yield SplitGT(feature_index, split_point)
+
+
+def _column_orders(data: np.ndarray, ordered: Iterable[bool]) -> dict:
+    """
+    Stable argsorts of the selected columns of a data matrix, sorted in a single call.
+
+    :param data: Input data matrix, n-by-d
+    :param ordered: Length-d flags selecting the columns to sort
+    :return: Dictionary mapping column index to argsort vector
+    """
+    columns = np.flatnonzero(list(ordered))
+    if len(columns) == 0:
+        return {}
+    orders = np.argsort(data[:, columns], axis=0, kind='stable')
+    return {j: orders[:, i] for i, j in enumerate(columns)}
 
 
 def one_vs_all(feature_vector, feature_index):
@@ -236,9 +353,11 @@ class AxisAlignedSplitGeneratorLC(SplitCandidateGeneratorLC):
 
     def genenerator(self, data: np.ndarray, y: np.ndarray) -> Iterable[SplitTest]:
 
+        orders = _column_orders(data, [spec is FeatureSpec.CONTINUOUS for spec in self.feature_spec])
+
         for j in range(len(self.feature_spec)):
             if self.feature_spec[j] is FeatureSpec.CONTINUOUS:
-                yield from fayyad_thresholds(data[:, j], j, y)
+                yield from fayyad_thresholds(data[:, j], j, y, orders[j])
             elif self.feature_spec[j] & FeatureSpec.DISCRETE:
                 yield from one_vs_all(data[:, j], j)
             else:
@@ -253,7 +372,8 @@ def generate_fayyad_thresholds(
     feature_vector: np.ndarray,
     feature_index: int,
     target_matrix: np.ndarray,
-    one_sided: bool
+    one_sided: bool,
+    order: Optional[np.ndarray] = None
 ) -> Iterable[Constraint]:
     """
     Generator of split constraints for numeric (or more generally orderable) values.
@@ -266,30 +386,12 @@ def generate_fayyad_thresholds(
     :param feature_index: Index of splitting feature (needed to create split object)
     :param target_matrix: Target value matrix, n-by-k
     :param one_sided: Whether to generate the constraint only on one side of each threshold
+    :param order: Stable argsort of the feature vector (computed if not given)
     """
-    v = sorted(zip(feature_vector, target_matrix), key=itemgetter(0))
-    
-    # Flag for handling the case when two identical x-values have distinct y-values
-    y_collision = False
-
-    for j in range(1, len(v), 1):
-        x_prev, y_prev = v[j-1]
-        x, y = v[j]
-
-        # Only place splits between distinct x-values
-        if x_prev < x:
-            # Only place splits between distinct y-values
-            if y_collision or np.any(y_prev != y):
-                split_point = (x_prev + x)/2
-                if not one_sided:
-                    yield SimpleConstraint(feature_index, Op.LEQ, split_point)
-                yield SimpleConstraint(feature_index, Op.GT, split_point)
-            # Reset collision flag when advancing in x-space
-            y_collision = False
-        else:
-            # Detect y-collision
-            if np.any(y_prev != y):
-                y_collision = True
+    for split_point in _fayyad_split_points(feature_vector, target_matrix, order):
+        if not one_sided:
+            yield SimpleConstraint(feature_index, Op.LEQ, split_point)
+        yield SimpleConstraint(feature_index, Op.GT, split_point)
 
 
 def generate_eq_constraints(feature_vector: np.ndarray, feature_index: int, all_but_one: bool) -> Iterable[Constraint]:
@@ -316,9 +418,11 @@ def generate_atomic_constraints(
     one_sided: bool
 ) -> Iterable[Constraint]:
 
+    orders = _column_orders(data, [bool(spec & FeatureSpec.ORDERED) for spec in feature_spec])
+
     for j, spec in enumerate(feature_spec):
         if spec & FeatureSpec.ORDERED:
-            yield from generate_fayyad_thresholds(data[:,j], j, y, one_sided)
+            yield from generate_fayyad_thresholds(data[:,j], j, y, one_sided, orders[j])
         elif spec & FeatureSpec.DISCRETE:
             yield from generate_eq_constraints(data[:,j], j, one_sided)
         else:
@@ -346,7 +450,7 @@ class DiscreteInformationGainLC(SplitScoreLC):
         branches = split.pick_branches(data)
         n = len(y)
         return scores.entropy_of_label_column(y) - sum(map(
-            lambda b: sum(branches == b) / n * scores.entropy_of_label_column(y[branches == b]),
+            lambda b: np.count_nonzero(branches == b) / n * scores.entropy_of_label_column(y[branches == b]),
             np.unique(branches)))
 
 
@@ -354,23 +458,36 @@ class ProbabilityImpurityLC(SplitScoreLC):
 
     def __init__(self, impurity: str = 'gini') -> None:
         if impurity == 'gini':
-            self.impurity = scores.gini_of_p_matrix
+            self.impurity_of_p = scores.gini_of_p_vector
             self.weighted_avg = True
         else: #information gain
-            self.impurity = scores.entropy_of_p_matrix
+            self.impurity_of_p = scores.entropy_of_p_vector
             self.weighted_avg = True
 
     def score(self, node, split: SplitTest, data: np.ndarray, y: np.ndarray) -> float:
         
+        n = len(y)
+
+        if n == 0:
+            return 0
+
         branches = split.pick_branches(data)
 
-        if self.weighted_avg:
-            n = len(y)
-            branch_impurity = lambda b: (branches == b).sum() / n * self.impurity(y[branches == b, :])
-        else:
-            branch_impurity = lambda b: self.impurity(y[branches == b, :])
+        # Per-branch sums of y, from which both the node's and the branches' mean p-vectors follow
+        counts = np.bincount(branches)
+        sums = np.column_stack([
+            np.bincount(branches, weights=y[:, j], minlength=len(counts))
+            for j in range(y.shape[1])])
 
-        return self.impurity(y) - sum(map(branch_impurity, np.unique(branches)))
+        branch_impurity = 0
+        for b in np.flatnonzero(counts):
+            p = sums[b] / counts[b]
+            # Pure branches have zero impurity
+            if p.max() < 1:
+                weight = counts[b] / n if self.weighted_avg else 1
+                branch_impurity += weight * self.impurity_of_p(p)
+
+        return self.impurity_of_p(sums.sum(axis=0) / n) - branch_impurity
 
 
 class IJCAI19LRGradientScoreLC(SplitScoreLC):
@@ -471,6 +588,127 @@ class AUROCSplitScoreLC(SplitScoreLC):
 # Split Generator Learner Component #
 #####################################
 
+class _Beam:
+    """
+    Beam for beam search: a bounded min-heap of the best-scoring items admitted so far.
+
+    Entries are (score, insertion count, item) tuples so that ties are broken by insertion order
+    and items are never compared directly.
+    """
+
+    def __init__(self, width: int):
+        self.width: int = width
+        self._heap = []
+        self._count: int = 0
+
+    def admit(self, score: float, item) -> bool:
+        """
+        Offer a scored item to the beam. Returns whether the beam changed.
+        """
+        entry = (score, self._count, item)
+        self._count += 1
+
+        if len(self._heap) < self.width:
+            heapq.heappush(self._heap, entry)
+            return True
+
+        if score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+
+        return False
+
+    def snapshot(self) -> List[ScoredItem]:
+        return [ScoredItem(score=score, item=item) for score, _, item in self._heap]
+
+    def best(self) -> ScoredItem:
+        score, _, item = max(self._heap, key=itemgetter(0))
+        return ScoredItem(score=score, item=item)
+
+    def __str__(self) -> str:
+        return str(self.snapshot())
+
+
+def _search_key(constraint) -> Optional[tuple]:
+    """
+    Hashable key identifying an m-of-n search state regardless of the order of its atoms.
+
+    Atomic constraints are keyed as their equivalent 1-of-1 constraint.
+    Returns None for constraints with unhashable atoms.
+    """
+    if isinstance(constraint, MofN):
+        m, atoms = constraint.m_to_satisfy, constraint.constraints
+    else:
+        m, atoms = 1, (constraint,)
+
+    try:
+        return m, frozenset(Counter(atoms).items())
+    except TypeError:
+        return None
+
+
+def _tests_sig_diff(constraint_a, constraint_b, x, alpha: float, cache: Optional[_ConstraintTestCache] = None) -> bool:
+    """
+    Chi-square test of whether two constraints are satisfied by significantly different shares of x.
+    """
+
+    # TODO: check if this test should use y-values, and if so, how?
+    #hard_y = y.argmax(axis=0)
+    test_matrix = (lambda c: c.test_matrix(x)) if cache is None else cache.test_matrix
+    n = x.shape[0]
+    a_count = np.count_nonzero(test_matrix(constraint_a))
+    b_count = np.count_nonzero(test_matrix(constraint_b))
+
+    freq = np.array(
+        [[a_count, n - a_count],
+        [b_count, n - b_count]]) + 1 # Smoothing for 0s
+    
+    _, p, _, _ = chi2_contingency(observed=freq)
+
+    return p < alpha
+
+
+def _beam_search(
+    node,
+    s_data,
+    s_y,
+    beam: _Beam,
+    constraint_candidates,
+    cache: _ConstraintTestCache,
+    split_scorer: SplitScoreLC,
+    alpha: float
+) -> None:
+    """
+    M-of-n beam search: grows the beam in place until no neighbor of its members gets in.
+
+    Neighbors are only scored if they test significantly differently from the constraint they
+    were grown from.
+    """
+
+    # Constraints already scored, which different search paths may rediscover
+    seen = {_search_key(scored_constraint.item) for scored_constraint in beam.snapshot()}
+    seen.discard(None)
+
+    beam_changed = True
+    while beam_changed:
+        logger.debug(f'm-of-n beam search beam: {beam}')
+        beam_changed = False
+
+        # Iterate over a snapshot of the beam while modifying the real thing
+        snapshot = beam.snapshot()
+        cache.expand(scored_constraint.item for scored_constraint in snapshot)
+        for scored_constraint in snapshot:
+            for new_constraint in MofN.neighboring_tests(scored_constraint.item, constraint_candidates):
+                key = _search_key(new_constraint)
+                if key in seen:
+                    continue
+                if _tests_sig_diff(scored_constraint.item, new_constraint, s_data, alpha, cache):
+                    if key is not None:
+                        seen.add(key)
+                    new_score = split_scorer.score(node, _CachedBinarySplit(new_constraint, cache), s_data, s_y)
+                    beam_changed |= beam.admit(new_score, new_constraint)
+
+
 # Interface definition:
 
 class SplitConstructorLC:
@@ -593,64 +831,32 @@ class MofNSplitConstructorLC(SplitConstructorLC):
         
         constraint_candidates = [constraint for split in candidate_splits for constraint in split.constraints]
 
+        cache = _ConstraintTestCache(s_data)
+
         # Initialize beam
-        prev_beam = []
+        beam = _Beam(self.beam_width)
 
         # M-of-N beam search assumes binary splits but an n-way split could have possibly been returned,
         # in which case the scores for binary splits corresponding to each output constraint would be different
         # from the n-way split score.
         if len(best_split.constraints) > 2:
-            beam = []
             for constraint in best_split.constraints:
-                heapq.heappush(
-                    beam,
-                    ScoredItem(
-                        score = self.split_scorer.score(node, BinarySplit(constraint), s_data, s_y),
-                        item = constraint))
-                while len(beam) > self.beam_width:
-                    heapq.heappop(beam)
+                beam.admit(
+                    self.split_scorer.score(node, _CachedBinarySplit(constraint, cache), s_data, s_y),
+                    constraint)
         else:
-            beam = [
-                ScoredItem(score = best_split_score, item = constraint)
-                for constraint in best_split.constraints]
-
-        # Beam search
-        while beam != prev_beam:
-            logger.debug(f'm-of-n beam search beam: {beam}')
-            prev_beam = beam.copy()
-
-            # Trick to iterate over a past snapshot of the beam while modifying the real thing
-            for scored_constraint in prev_beam:
-                for new_constraint in MofN.neighboring_tests(scored_constraint.item, constraint_candidates):
-                    if self.tests_sig_diff(scored_constraint.item, new_constraint, s_data, s_y):
-                        new_score = self.split_scorer.score(node, BinarySplit(new_constraint), s_data, s_y)
-
-                        new_scored_constraint = ScoredItem(score = new_score, item = new_constraint)
-
-                        if len(beam) < self.beam_width:
-                            heapq.heappush(beam, new_scored_constraint)
-                        else:
-                            heapq.heappushpop(beam, new_scored_constraint)
+            for constraint in best_split.constraints:
+                beam.admit(best_split_score, constraint)
+
+        _beam_search(node, s_data, s_y, beam, constraint_candidates, cache, self.split_scorer, self.alpha)
             
         # TODO: literal pruning (see pages 57-58)
 
-        return BinarySplit(max(beam).item)
+        return BinarySplit(beam.best().item)
     
 
-    def tests_sig_diff(self, constraint_a, constraint_b, x, y):
-
-        # TODO: check if this test should use y-values, and if so, how?
-        #hard_y = y.argmax(axis=0)
-        a_branch = np.apply_along_axis(constraint_a.test, axis=1, arr=x)
-        b_branch = np.apply_along_axis(constraint_b.test, axis=1, arr=x)
-
-        freq = np.array(
-            [[sum(a_branch), sum(~a_branch)],
-            [sum(b_branch), sum(~b_branch)]]) + 1 # Smoothing for 0s
-        
-        _, p, _, _ = chi2_contingency(observed=freq)
-
-        return p < self.alpha
+    def tests_sig_diff(self, constraint_a, constraint_b, x, y, cache: Optional[_ConstraintTestCache] = None):
+        return _tests_sig_diff(constraint_a, constraint_b, x, self.alpha, cache)
         
 
 class GroupSplitConstructorLC(SplitConstructorLC):
@@ -739,6 +945,8 @@ class GroupSplitConstructorLC(SplitConstructorLC):
             logger.error('There were no constraint candidates for building a split!')
             return None # Or should this be an exception?
 
+        cache = _ConstraintTestCache(s_data)
+
         # Will record best split
         best_split = None
         best_split_score = 0
@@ -747,23 +955,27 @@ class GroupSplitConstructorLC(SplitConstructorLC):
         for group_label, feature_group in self.feature_groups.items():
             
             # See if this beats best group-level winner
-            winner = self._group_constraints_search(node, s_data, s_y, all_constraint_candidates, feature_group, group_label)
+            winner = self._group_constraints_search(
+                node, s_data, s_y, all_constraint_candidates, feature_group, group_label, cache)
             if winner.score > best_split_score:
                 best_split_score = winner.score
                 best_split = BinarySplit(winner.item)
 
         return best_split
     
-    def _group_constraints_search(self, node, s_data, s_y, all_constraint_candidates, feature_group, group_label='UNLABELED GROUP') -> ScoredItem:
+    def _group_constraints_search(self, node, s_data, s_y, all_constraint_candidates, feature_group, group_label='UNLABELED GROUP', cache=None) -> ScoredItem:
+
+        if cache is None:
+            cache = _ConstraintTestCache(s_data)
 
         if self.search_mode == 'm_of_n':
-            return self._m_of_n_split_search(node, s_data, s_y, all_constraint_candidates, feature_group, group_label)
+            return self._m_of_n_split_search(node, s_data, s_y, all_constraint_candidates, feature_group, group_label, cache)
         if self.search_mode == 'groups':
-            return self._groups_split_search(node, s_data, s_y, all_constraint_candidates, feature_group, group_label)
+            return self._groups_split_search(node, s_data, s_y, all_constraint_candidates, feature_group, group_label, cache)
 
         raise ValueError(f'Invalid search mode "{self.search_mode}"')        
 
-    def _groups_split_search(self, node, s_data, s_y, all_constraint_candidates, feature_group, group_label) -> ScoredItem:
+    def _groups_split_search(self, node, s_data, s_y, all_constraint_candidates, feature_group, group_label, cache) -> ScoredItem:
 
         logger.debug('Building constraint set for group')
 
@@ -775,7 +987,7 @@ class GroupSplitConstructorLC(SplitConstructorLC):
             for constraint in all_constraint_candidates:
                 f = constraint.feature
                 if f in feature_group:
-                    score = self.split_scorer.score(node, BinarySplit(constraint), s_data, s_y)
+                    score = self.split_scorer.score(node, _CachedBinarySplit(constraint, cache), s_data, s_y)
                     if f not in best_constraint_scores or best_constraint_scores[f].score < score:
                         new_best = ScoredItem(
                             score=score,
@@ -796,7 +1008,7 @@ class GroupSplitConstructorLC(SplitConstructorLC):
             return ScoredItem(
                 score = self.split_scorer.score(
                     node,
-                    BinarySplit(constraint),
+                    _CachedBinarySplit(constraint, cache),
                     s_data, s_y),
                 item = constraint)
 
@@ -831,57 +1043,23 @@ class GroupSplitConstructorLC(SplitConstructorLC):
 
         return best
 
-    def _m_of_n_split_search(self, node, s_data, s_y, all_constraint_candidates, feature_group, group_label) -> ScoredItem:
+    def _m_of_n_split_search(self, node, s_data, s_y, all_constraint_candidates, feature_group, group_label, cache) -> ScoredItem:
 
         # Filter constraint candidates to those within the group
         constraint_candidates = [c for c in all_constraint_candidates if c.feature in feature_group]
 
         # Initialize beam
-        prev_beam = []
-        beam = []
+        beam = _Beam(self.beam_width)
         for constraint in constraint_candidates:
-            new_scored_constraint = ScoredItem(
-                    score = self.split_scorer.score(node, BinarySplit(constraint), s_data, s_y),
-                    item = constraint)
-
-            if len(beam) < self.beam_width:
-                heapq.heappush(beam, new_scored_constraint)
-            else:
-                heapq.heappushpop(beam, new_scored_constraint)
-
-        # Beam search
-        while beam != prev_beam:
-            logger.debug(f'm-of-n beam search beam: {beam}')
-            prev_beam = beam.copy()
+            beam.admit(
+                self.split_scorer.score(node, _CachedBinarySplit(constraint, cache), s_data, s_y),
+                constraint)
 
-            # Trick to iterate over a past snapshot of the beam while modifying the real thing
-            for scored_constraint in prev_beam:
-                for new_constraint in MofN.neighboring_tests(scored_constraint.item, constraint_candidates):
-                    if self.tests_sig_diff(scored_constraint.item, new_constraint, s_data, s_y):
-                        new_score = self.split_scorer.score(node, BinarySplit(new_constraint), s_data, s_y)
-
-                        new_scored_constraint = ScoredItem(score = new_score, item = new_constraint)
-
-                        if len(beam) < self.beam_width:
-                            heapq.heappush(beam, new_scored_constraint)
-                        else:
-                            heapq.heappushpop(beam, new_scored_constraint)
+        _beam_search(node, s_data, s_y, beam, constraint_candidates, cache, self.split_scorer, self.alpha)
             
         # TODO: literal pruning (see pages 57-58)
 
-        return max(beam)
-
-    def tests_sig_diff(self, constraint_a, constraint_b, x, y):
-
-        # TODO: check if this test should use y-values, and if so, how?
-        #hard_y = y.argmax(axis=0)
-        a_branch = np.apply_along_axis(constraint_a.test, axis=1, arr=x)
-        b_branch = np.apply_along_axis(constraint_b.test, axis=1, arr=x)
-
-        freq = np.array(
-            [[sum(a_branch), sum(~a_branch)],
-            [sum(b_branch), sum(~b_branch)]]) + 1 # Smoothing for 0s
-        
-        _, p, _, _ = chi2_contingency(observed=freq)
+        return beam.best()
 
-        return p < self.alpha
+    def tests_sig_diff(self, constraint_a, constraint_b, x, y, cache: Optional[_ConstraintTestCache] = None):
+        return _tests_sig_diff(constraint_a, constraint_b, x, self.alpha, cache)
@@ -54,3 +54,25 @@ def test_vector_constraints_tester():
         test((first_gt_3, second_leq_3, first_leq_3), test_matrix),
         [False, False, False, False, False, False]
     )
+
+
+def test_test_matrix_matches_test():
+
+    from generalizedtrees.constraints import GTConstraint, LEQConstraint, EQConstraint, MofN, NegatedConstraint
+
+    rng = np.random.default_rng(20201015)
+    test_matrix = rng.integers(5, size=(50, 3))
+
+    constraints = [
+        GTConstraint(0, 2),
+        LEQConstraint(1, 1),
+        EQConstraint(2, 3),
+        NegatedConstraint(GTConstraint(0, 2)),
+        MofN(2, (GTConstraint(0, 2), LEQConstraint(1, 1), EQConstraint(2, 3)))
+    ]
+
+    for constraint in constraints:
+        np.testing.assert_array_equal(
+            constraint.test_matrix(test_matrix),
+            [constraint.test(row) for row in test_matrix]
+        )
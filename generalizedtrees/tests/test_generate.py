@@ -0,0 +1,64 @@
+# Tests for unlabeled data generation
+#
+# Licensed under the BSD 3-Clause License
+# Copyright (c) 2020, Yuriy Sverchkov
+
+import pytest
+import numpy as np
+
+
+def test_same_distribution():
+
+    from generalizedtrees.generate import same_distribution
+    from generalizedtrees.features import FeatureSpec
+
+    rng = np.random.default_rng(20201015)
+    feature_spec = (FeatureSpec.CONTINUOUS, FeatureSpec.DISCRETE, FeatureSpec.CONTINUOUS)
+
+    def sample(n, shift=0):
+        return np.column_stack((
+            rng.normal(size=n),
+            rng.integers(3, size=n),
+            rng.normal(loc=shift, size=n)))
+
+    data = sample(500)
+
+    assert not same_distribution(data, sample(500), feature_spec=feature_spec, alpha=0.05)
+    assert same_distribution(data, sample(500, shift=1), feature_spec=feature_spec, alpha=0.05)
+
+
+def test_ks_2samp_statistics():
+
+    from scipy.stats import ks_2samp
+    from generalizedtrees.generate import _ks_2samp_statistics
+
+    rng = np.random.default_rng(20201015)
+
+    # Include a column with many ties
+    data_1 = np.column_stack((rng.normal(size=40), rng.integers(5, size=40)))
+    data_2 = np.column_stack((rng.normal(loc=0.5, size=65), rng.integers(1, 6, size=65)))
+
+    expected = [ks_2samp(data_1[:, j], data_2[:, j]).statistic for j in range(data_1.shape[1])]
+
+    np.testing.assert_allclose(_ks_2samp_statistics(data_1, data_2), expected)
+
+
+def test_trepan_generator_constraints():
+
+    from generalizedtrees.generate import TrepanDataFactoryLC
+    from generalizedtrees.features import FeatureSpec
+    from generalizedtrees.constraints import GTConstraint, LEQConstraint, NEQConstraint, test
+
+    rng = np.random.default_rng(20201015)
+    data = np.column_stack((rng.normal(size=200), rng.integers(4, size=200)))
+
+    # A single attempt must suffice: axis-aligned constraints are sampled from directly
+    factory = TrepanDataFactoryLC(max_attempts=1, on_timeout='raise', rng=rng)
+    factory.feature_spec = (FeatureSpec.CONTINUOUS, FeatureSpec.DISCRETE)
+    factory = factory.refit(data)
+
+    constraints = (GTConstraint(0, 1.5), LEQConstraint(0, 2.5), LEQConstraint(0, 3), NEQConstraint(1, 2))
+    sample = factory.generate(100, constraints)
+
+    assert sample.shape == (100, 2)
+    assert test(constraints, sample).all()
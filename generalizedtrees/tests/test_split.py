@@ -0,0 +1,148 @@
+# Tests for split classes
+#
+# Licensed under the BSD 3-Clause License
+# Copyright (c) 2020, Yuriy Sverchkov
+
+import pytest
+import numpy as np
+
+
+def test_split_every_value():
+
+    from generalizedtrees.split import SplitEveryValue
+
+    split = SplitEveryValue(1, [3, 1, 2])
+
+    test_matrix = np.array([
+        [0, 1],
+        [5, 2],
+        [2, 3],
+        [3, 3],
+        [4, 1]
+    ])
+
+    branches = split.pick_branches(test_matrix)
+
+    np.testing.assert_array_equal(branches, [1, 2, 0, 0, 1])
+
+    for b, constraint in enumerate(split.constraints):
+        np.testing.assert_array_equal(constraint.test_matrix(test_matrix), branches == b)
+
+    with pytest.raises(ValueError):
+        split.pick_branches(np.array([[0, 4]]))
+
+
+def test_fayyad_thresholds():
+
+    from generalizedtrees.split import fayyad_thresholds
+
+    x = np.array([4, 1, 2, 3, 3, 5, 6])
+    y = np.array([[1], [0], [0], [0], [1], [1], [0]])
+
+    # Thresholds are only placed where the label changes, or after a run of
+    # identical x-values with distinct labels (x == 3 here)
+    np.testing.assert_array_equal(
+        [split.value for split in fayyad_thresholds(x, 0, y)],
+        [3.5, 5.5])
+
+
+def test_constraint_test_cache():
+
+    from generalizedtrees.split import _ConstraintTestCache
+    from generalizedtrees.constraints import GTConstraint, LEQConstraint, EQConstraint, MofN
+
+    rng = np.random.default_rng(20201015)
+    test_matrix = rng.integers(5, size=(50, 3))
+    cache = _ConstraintTestCache(test_matrix)
+
+    atoms = (GTConstraint(0, 2), LEQConstraint(1, 1), EQConstraint(2, 3))
+    constraints = list(atoms) + [
+        MofN(1, atoms[:1]),
+        MofN(1, atoms[:2]),
+        MofN(2, atoms),
+        MofN(2, atoms[::-1]),
+        MofN(1, (atoms[0], ~atoms[0], atoms[2]))
+    ]
+
+    # Test twice to exercise both computed and cached results
+    for constraint in constraints * 2:
+        np.testing.assert_array_equal(cache.test_matrix(constraint), constraint.test_matrix(test_matrix))
+
+    # Also when counts are kept for expanded constraints
+    cache.expand([atoms[0], MofN(1, atoms[:2])])
+    for constraint in constraints:
+        np.testing.assert_array_equal(cache.test_matrix(constraint), constraint.test_matrix(test_matrix))
+
+
+def test_constraint_test_cache_bounded():
+
+    from itertools import permutations
+    from generalizedtrees.split import _ConstraintTestCache
+    from generalizedtrees.constraints import GTConstraint, MofN
+
+    rng = np.random.default_rng(7)
+    cache = _ConstraintTestCache(rng.normal(size=(100, 4)))
+
+    atoms = [GTConstraint(f, t) for f in range(4) for t in (-0.5, 0, 0.5)]
+
+    # Testing m-of-n constraints that weren't grown from an expanded one stores nothing beyond atom tests
+    for atom_tuple in permutations(atoms, 3):
+        cache.test_matrix(MofN(2, atom_tuple, reduce=False))
+
+    assert len(cache._atom_tests) == len(atoms)
+    assert len(cache._expanded_counts) == 0
+
+    # Counts are only kept for the constraints currently being expanded
+    cache.expand([MofN(1, atoms[:2]), MofN(1, atoms[2:4])])
+    assert len(cache._expanded_counts) == 2
+
+    cache.expand([atoms[0]])
+    assert len(cache._expanded_counts) == 1
+
+
+def test_beam():
+
+    from generalizedtrees.split import _Beam
+
+    beam = _Beam(2)
+
+    assert beam.admit(1, 'a')
+    assert beam.admit(3, 'b')
+    assert not beam.admit(1, 'c') # Ties with the worst item don't displace it
+    assert beam.admit(2, 'd')
+    assert not beam.admit(0, 'e')
+
+    assert sorted(item.item for item in beam.snapshot()) == ['b', 'd']
+    assert beam.best().item == 'b'
+
+
+def test_probability_impurity_score():
+
+    from generalizedtrees.split import ProbabilityImpurityLC, SplitEveryValue
+    from generalizedtrees import scores
+
+    rng = np.random.default_rng(7)
+    data = rng.integers(0, 3, size=(50, 1))
+    y = rng.dirichlet(np.ones(3), size=50)
+    y[data[:, 0] == 0] = [1, 0, 0] # A pure branch
+
+    split = SplitEveryValue(0, np.unique(data[:, 0]))
+    branches = split.pick_branches(data)
+
+    for impurity, of_matrix in (('gini', scores.gini_of_p_matrix), ('entropy', scores.entropy_of_p_matrix)):
+        expected = of_matrix(y) - sum(
+            np.mean(branches == b) * of_matrix(y[branches == b]) for b in np.unique(branches))
+        assert ProbabilityImpurityLC(impurity).score(None, split, data, y) == pytest.approx(expected)
+
+
+def test_search_key():
+
+    from generalizedtrees.split import _search_key
+    from generalizedtrees.constraints import GTConstraint, LEQConstraint, MofN
+
+    a, b = GTConstraint(0, 2), LEQConstraint(1, 1)
+
+    assert _search_key(a) == _search_key(MofN(1, (a,)))
+    assert _search_key(MofN(1, (a, b))) == _search_key(MofN(1, (b, a)))
+    assert _search_key(MofN(1, (a, b))) != _search_key(MofN(2, (a, b)))
+    assert _search_key(MofN(1, (a, a))) != _search_key(MofN(1, (a,)))
@@ -132,3 +132,47 @@ def test_trepan_pandas(breast_cancer_data_pandas, breast_cancer_rf_model, caplog
 
     logger.info("Done")
 
+
+
+def test_trepan_parallel(breast_cancer_data, breast_cancer_rf_model, caplog):
+
+    from generalizedtrees.recipes import trepan
+    from generalizedtrees.features import FeatureSpec
+    from numpy.random import default_rng
+    import logging
+
+    logger = logging.getLogger()
+    caplog.set_level(logging.DEBUG)
+
+    x_train = breast_cancer_data.x_train
+    x_test = breast_cancer_data.x_test
+    model = breast_cancer_rf_model
+
+    d = x_train.shape[1]
+    max_tree_size = 10
+
+    def fit_explanation():
+        explanation = trepan(max_tree_size=max_tree_size, max_attempts=3, rng=default_rng(0), n_workers=4)
+        explanation.fit(x_train, model.predict_proba, feature_spec = (FeatureSpec.CONTINUOUS,)*d)
+        return explanation
+
+    logger.info("Fitting tree")
+    explanation = fit_explanation()
+
+    logger.info(f'Learned tree:\n{explanation.show_tree()}')
+
+    # The size limit is checked before every expansion, so only the last (binary) split can exceed it
+    assert len(explanation.tree) <= max_tree_size + 1
+
+    # Every node expansion is recorded exactly once
+    node_numbers = sorted(node.node_number for node in explanation.tree if node.node_number is not None)
+    assert node_numbers == list(range(len(node_numbers)))
+
+    # Seeded fits are reproducible
+    logger.info("Refitting tree")
+    assert fit_explanation().show_tree() == explanation.show_tree()
+
+    logger.info("Running prediction")
+    explanation.predict(x_test)
+
+    logger.info("Done")
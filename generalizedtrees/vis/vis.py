@@ -64,42 +64,7 @@ def explanation_to_simplified(explanation, feature_annotations = None):
 
         out_node, in_node = stack.pop()
 
-        # Record training set counts (and target distributions)
-        if hasattr(in_node.item, 'y'):
-            if hasattr(in_node.item, 'n_training'):
-                y_train = in_node.item.y[0:in_node.item.n_training]
-                y_gen = in_node.item.y[in_node.item.n_training:]
-
-                out_node['generated_samples'] = [
-                    {'label': str(k), 'count': int(v)} for v, k in
-                    zip(y_gen.sum(axis=0), explanation.target_names)]
-            else:
-                y_train = in_node.item.y
-
-            out_node['training_samples'] = [
-                {'label':str(k), 'count': int(v)} for v, k in
-                zip(y_train.sum(axis=0), explanation.target_names)]
-
-
-        # Record split
-        if hasattr(in_node.item, 'split') and in_node.item.split is not None:
-            out_node['split'] = str(in_node.item.split)
-
-            if feature_annotations is not None:
-                try:
-                    f = in_node.item.split.feature
-                    annotation = feature_annotations.loc[f]
-                    out_node['feature_annotation'] = [{
-                        'annotation': 'feature id',
-                        'value': _ensure_native(f)}]
-                    out_node['feature_annotation'].extend([
-                        {'annotation': str(i), 'value': _ensure_native(v)}
-                        for i, v in annotation.iteritems()])
-                
-                except Exception as e:
-                    logger.warning(
-                        f"Could not bind feature annotation to {in_node.item.split}",
-                        exc_info=e)
+        out_node.update(_node_to_simplified(in_node.item, explanation, feature_annotations))
         
         # Record children
         if not in_node.is_leaf:
@@ -108,10 +73,60 @@ def explanation_to_simplified(explanation, feature_annotations = None):
                 for c in in_node]
             for pair in zip(out_node['children'], in_node):
                 stack.push(pair)
-        
-        # Node-model specific conversions should be implemented elsewhere.
-        if hasattr(in_node.item, 'model') and in_node.item.model is not None:
-            # Currently a stump
-            out_node['model'] = model_to_simplified(in_node.item.model, explanation)
     
     return root
+
+
+def _samples_to_simplified(y, target_names):
+    return [
+        {'label': str(k), 'count': int(v)} for v, k in
+        zip(y.sum(axis=0), target_names)]
+
+
+def _node_to_simplified(item, explanation, feature_annotations = None):
+    """
+    Convert the contents of a single tree node (excluding children) to a simplified dict.
+
+    Each optional node attribute is looked up once.
+    """
+
+    out_node = dict()
+
+    # Record training set counts (and target distributions)
+    y = getattr(item, 'y', None)
+    if y is not None:
+        n_training = getattr(item, 'n_training', None)
+        if n_training is not None:
+            out_node['generated_samples'] = _samples_to_simplified(y[n_training:], explanation.target_names)
+            y = y[:n_training]
+
+        out_node['training_samples'] = _samples_to_simplified(y, explanation.target_names)
+
+    # Record split
+    split = getattr(item, 'split', None)
+    if split is not None:
+        out_node['split'] = str(split)
+
+        if feature_annotations is not None:
+            try:
+                f = split.feature
+                annotation = feature_annotations.loc[f]
+                out_node['feature_annotation'] = [{
+                    'annotation': 'feature id',
+                    'value': _ensure_native(f)}]
+                out_node['feature_annotation'].extend([
+                    {'annotation': str(i), 'value': _ensure_native(v)}
+                    for i, v in annotation.items()])
+            
+            except Exception as e:
+                logger.warning(
+                    f"Could not bind feature annotation to {split}",
+                    exc_info=e)
+
+    # Node-model specific conversions should be implemented elsewhere.
+    model = getattr(item, 'model', None)
+    if model is not None:
+        # Currently a stump
+        out_node['model'] = model_to_simplified(model, explanation)
+
+    return out_node